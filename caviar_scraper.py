@@ -1,10 +1,24 @@
-import os, re, json, time, yaml, sqlite3, xml.etree.ElementTree as ET
+import functools
+import os, re, json, time, threading, yaml, sqlite3, xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, astuple, asdict
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, urlencode
 import requests
+import soupsieve
+
+# orjson decodes multi-KB JSON-LD blobs several times faster than the
+# stdlib; fall back silently when it isn't installed.
+try:
+    import orjson as _orjson
+    def _json_loads(s):
+        return _orjson.loads(s.encode() if isinstance(s, str) else s)
+except ImportError:
+    _json_loads = json.loads
 from requests.adapters import HTTPAdapter, Retry
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 # =====================================================
 # CONFIG
@@ -17,6 +31,7 @@ MAX_LINKS_PER_SITE  = int(os.getenv("MAX_LINKS_PER_SITE", "500"))
 MAX_PAGES_PER_SITE  = int(os.getenv("MAX_PAGES_PER_SITE", "160"))
 MAX_PRODUCTS_PER_SITE = int(os.getenv("MAX_PRODUCTS_PER_SITE", "220"))
 VERBOSE_LOG         = os.getenv("VERBOSE_LOG", "1") == "1"
+MAX_FETCH_BYTES     = int(os.getenv("MAX_FETCH_BYTES", "1500000"))
 
 # Size rules
 MIN_TIN_G          = 28   # hard minimum to accept any product
@@ -29,18 +44,29 @@ SPECIALS_MAX_G     = 260
 # CONSTANTS & REGEX
 # =====================================================
 CAVIAR_WORD = re.compile(r"\bcaviar\b", re.I)
+# Bytes twin of CAVIAR_WORD for pre-parse screening of raw response bodies.
+CAVIAR_WORD_B = re.compile(rb"\bcaviar\b", re.I)
 SIZE_RE     = re.compile(r"(\d+(?:\.\d+)?)\s*(g|gram|grams|oz|ounce|ounces)\b", re.I)
 MONEY_RE    = re.compile(r"([$\£\€])\s*([0-9]+(?:\.[0-9]{1,2})?)")
 SOLD_OUT_RE = re.compile(r"\bsold\s*out\b|\bout\s*of\s*stock\b", re.I)
 
+CURRENCY_MAP = {'$':'USD','£':'GBP','€':'EUR'}
+OZ_G = 28.3495  # grams per ounce
+
 LIKELY_TIN_SIZES_G = [28,30,50,57,85,100,113,125,180,200,250,500,1000]
+# Includes the hard minimum so the tin-likeness check doesn't rebuild the
+# list on every product page.
+TIN_LIKE_SIZES_G = LIKELY_TIN_SIZES_G + [MIN_TIN_G]
 
 GRADE_RANK = {"imperial":1,"royal":2,"reserve":3,"gold":3,"classic":4,"select":5,"traditional":6}
+GRADE_RES = [(re.compile(rf"\b{re.escape(g)}\b", re.I), g.title()) for g in GRADE_RANK]
 
 NON_STURGEON_TOKENS = [
     "salmon","trout","whitefish","capelin","lumpfish",
     "bowfin","paddlefish","tobiko","masago","ikura","smelt","cod roe"
 ]
+NON_STURGEON_RE = re.compile(
+    "|".join(rf"\b{re.escape(tok)}\b" for tok in NON_STURGEON_TOKENS), re.I)
 
 # accessory filters — CAREFUL: no “class”
 EXCLUDE_WORDS = [
@@ -50,12 +76,22 @@ EXCLUDE_WORDS = [
     "gift card","chips","tote","bag","club","subscription","subscribe","duo","trio","quad","pack",
     "tasting","pair","collection","assortment","starter"
 ]
+# Single automaton over all accessory terms: whole-word match for single
+# words, plain substring match for multi-word phrases (same semantics as
+# the old per-term scan, one pass instead of ~40).
+EXCLUDE_RE = re.compile("|".join(
+    re.escape(w) if " " in w else rf"\b{re.escape(w)}\b"
+    for w in EXCLUDE_WORDS), re.I)
 
 PRODUCT_URL_HINTS = ("/products/", "/product/", "/shop/")
 DISALLOWED_URL_PARTS = (
     "/cart","/account","/login","/checkout","/policy","/policies",
     "/privacy","/terms","/search","/faq","/returns","/shipping","/blog"
 )
+# Compiled once so each URL is filtered in a single regex pass instead of
+# one substring scan per hint/blocked part.
+PRODUCT_HINT_RE   = re.compile("|".join(re.escape(h) for h in PRODUCT_URL_HINTS))
+DISALLOWED_URL_RE = re.compile("|".join(re.escape(p) for p in DISALLOWED_URL_PARTS))
 
 VENDOR_HOME_STATE = {
     "Marshallberg Farm":"NC","Sterling":"CA","Tsar Nicoulai":"CA",
@@ -70,16 +106,7 @@ VENDOR_HOME_STATE = {
 # ACCESSORY CHECK
 # =====================================================
 def is_accessory_name_only(product_name):
-    t = (product_name or "").lower()
-    words = set(re.findall(r"[a-z]+", t))
-    for w in EXCLUDE_WORDS:
-        if " " in w:
-            if w in t:
-                return True
-        else:
-            if w in words:
-                return True
-    return False
+    return bool(EXCLUDE_RE.search(product_name or ""))
 
 # =====================================================
 # HTTP SESSION
@@ -91,13 +118,50 @@ def make_session():
     })
     retries = Retry(total=4, backoff_factor=0.5,
                     status_forcelist=[403,429,500,502,503,504])
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://",  HTTPAdapter(max_retries=retries))
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retries)
+    s.mount("https://", adapter)
+    s.mount("http://",  adapter)
     return s
 
-def safe_get(sess, url, timeout=20):
+# One session for the whole run so keep-alive/TLS is reused across sites
+# instead of re-handshaking per crawl_site call.
+_SESSION = None
+
+def shared_session():
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = make_session()
+    return _SESSION
+
+# Per-host politeness: requests to the same netloc are spaced at least
+# HOST_MIN_GAP seconds apart, while different hosts proceed in parallel.
+# Each thread reserves the next slot under the lock and sleeps outside it.
+HOST_MIN_GAP = float(os.getenv("HOST_MIN_GAP", "0.5"))
+_HOST_NEXT_SLOT = {}
+# Sites can override the default gap with a min_gap key in price_sites.yaml;
+# crawl_site registers it here for each of the site's allowed hosts.
+_HOST_GAP = {}
+_HOST_LOCK = threading.Lock()
+
+def _throttle_host(url):
+    host = norm_netloc(_urlparse(url).netloc)
+    with _HOST_LOCK:
+        now = time.monotonic()
+        slot = max(now, _HOST_NEXT_SLOT.get(host, 0.0))
+        _HOST_NEXT_SLOT[host] = slot + _HOST_GAP.get(host, HOST_MIN_GAP)
+    if slot > now:
+        time.sleep(slot - now)
+
+def safe_get(sess, url, timeout=20, headers=None, max_bytes=MAX_FETCH_BYTES):
+    """GET with the body capped at max_bytes. Product data (title, h1,
+    JSON-LD) sits near the top of the page, so a pathological multi-MB
+    page costs at most the cap instead of blowing up RSS."""
     try:
-        return sess.get(url, timeout=timeout)
+        _throttle_host(url)
+        r = sess.get(url, timeout=timeout, headers=headers, stream=True)
+        r._content = r.raw.read(max_bytes, decode_content=True)
+        r.close()
+        return r
     except Exception as e:
         if VERBOSE_LOG: print("GET exception:", e, url)
         return None
@@ -105,155 +169,372 @@ def safe_get(sess, url, timeout=20):
 # =====================================================
 # HELPERS
 # =====================================================
-def parse_size(text):
-    m = SIZE_RE.search(text or "")
-    if not m: return None
-    val, unit = float(m.group(1)), m.group(2).lower()
-    return val * 28.3495 if unit.startswith("oz") else val
+def parse_size(*texts):
+    # Scans candidates in order and stops at the first hit — callers pass
+    # the short string (name/variant title) before the page text so the
+    # big string is usually never searched, and never concatenated.
+    for text in texts:
+        m = SIZE_RE.search(text or "")
+        if m:
+            val, unit = float(m.group(1)), m.group(2).lower()
+            return val * OZ_G if unit.startswith("oz") else val
+    return None
 
+# Sizes cluster on a handful of tin weights, so the label formatting is
+# worth memoizing across products and digest rows.
+@functools.lru_cache(maxsize=256)
 def size_label_both(g):
     if not g: return None
-    oz = g/28.3495
+    oz = g/OZ_G
     oz_str = f"{oz:.1f}".rstrip("0").rstrip(".")
     return f"{oz_str} oz / {int(round(g))} g"
 
 def mentions_non_sturgeon(text):
-    t=(text or "").lower()
-    return any(re.search(rf"\b{re.escape(tok)}\b", t) for tok in NON_STURGEON_TOKENS)
+    return bool(NON_STURGEON_RE.search(text or ""))
 
 def vendor_state(vendor): 
     return VENDOR_HOME_STATE.get(vendor,"US")
 
+# Priority-ordered species table fused into one alternation regex: a single
+# scan of the text replaces one substring pass per species.
+_SPECIES_TABLE = [
+    ("osetra",   r"osetra|oscietra",    "Osetra",         "Acipenser gueldenstaedtii"),
+    ("siberian", r"siberian|baerii",    "Siberian",       "Acipenser baerii"),
+    ("kaluga",   r"kaluga",             "Kaluga Hybrid",  "Huso dauricus × Acipenser schrenckii"),
+    ("white",    r"white\s+sturgeon",   "White Sturgeon", "Acipenser transmontanus"),
+    ("sevruga",  r"sevruga",            "Sevruga",        "Acipenser stellatus"),
+    ("beluga",   r"beluga|huso\s+huso", "Beluga",         "Huso huso"),
+]
+SPECIES_RE = re.compile(
+    "|".join(f"(?P<{key}>{pat})" for key, pat, _, _ in _SPECIES_TABLE), re.I)
+SPECIES_BY_GROUP = {key: (common, latin) for key, _, common, latin in _SPECIES_TABLE}
+_SPECIES_PRIORITY = {key: i for i, (key, _, _, _) in enumerate(_SPECIES_TABLE)}
+
 def extract_species(t):
-    t = (t or "").lower()
-    if "osetra" in t or "oscietra" in t: return "Osetra","Acipenser gueldenstaedtii"
-    if "siberian" in t or "baerii" in t: return "Siberian","Acipenser baerii"
-    if "kaluga" in t: return "Kaluga Hybrid","Huso dauricus × Acipenser schrenckii"
-    if "white" in t and "sturgeon" in t: return "White Sturgeon","Acipenser transmontanus"
-    if "sevruga" in t: return "Sevruga","Acipenser stellatus"
-    if "beluga" in t or "huso huso" in t: return "Beluga","Huso huso"
-    return None,None
+    # Single pass over the text; keep the table's priority order when
+    # several species are mentioned (e.g. comparison blurbs).
+    best = None
+    for m in SPECIES_RE.finditer(t or ""):
+        rank = _SPECIES_PRIORITY[m.lastgroup]
+        if best is None or rank < best[0]:
+            best = (rank, m.lastgroup)
+            if rank == 0:
+                break
+    if best is None:
+        return None,None
+    return SPECIES_BY_GROUP[best[1]]
 
 def grade_from_text(text):
-    t=(text or "").lower()
-    for g,rank in GRADE_RANK.items():
-        if re.search(rf"\b{re.escape(g)}\b", t):
-            return g.title()
+    t=text or ""
+    for rx, title in GRADE_RES:
+        if rx.search(t):
+            return title
     return None
 
+# =====================================================
+# RECORD
+# =====================================================
+# Field order matches the INSERT column order in store().
+@dataclass(slots=True)
+class PriceRow:
+    vendor: str
+    url: str
+    name: str
+    species: str
+    species_latin: str
+    grade: str
+    currency: str
+    price: float
+    size_g: float
+    size_label: str
+    per_g: float
+    origin_state: str
+
 # =====================================================
 # DB
 # =====================================================
+# Column list mirrors the PriceRow field order; building the INSERT once
+# at import means store() never re-derives the SQL string.
+PRICES_COLS = tuple(f.strip() for f in
+    "vendor,url,name,species,species_latin,grade,currency,price,"
+    "size_g,size_label,per_g,origin_state,seen_at".split(","))
+# OR IGNORE + the uniq_price_snapshot index let SQLite drop repeat
+# same-day snapshots inside the B-tree instead of growing the table by
+# runs x products.
+INSERT_PRICES_SQL = (
+    f"INSERT OR IGNORE INTO prices({','.join(PRICES_COLS)}) "
+    f"VALUES({','.join('?'*len(PRICES_COLS))})")
+
 def init_db(path):
     conn = sqlite3.connect(path, check_same_thread=False)
+    # Scraper-cache friendly settings: WAL avoids the rollback-journal
+    # double write, NORMAL drops the per-commit fsync, and the rest keep
+    # temp/sort work in memory.
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL",
+                   "temp_store=MEMORY", "cache_size=-20000",
+                   "mmap_size=268435456"):
+        conn.execute(f"PRAGMA {pragma}")
     conn.execute("""CREATE TABLE IF NOT EXISTS prices(
         id INTEGER PRIMARY KEY,
         vendor TEXT,url TEXT,name TEXT,
         species TEXT,species_latin TEXT,grade TEXT,
         currency TEXT,price REAL,size_g REAL,size_label TEXT,
         per_g REAL,origin_state TEXT,seen_at TEXT)""")
+    # Lets the latest_best_by_vendor window read rows already in
+    # partition+order instead of sorting the whole history each run.
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_prices_vendor_url_size_seen
+        ON prices(vendor,url,size_g,seen_at)""")
+    # One snapshot per product/price per day; paired with INSERT OR IGNORE
+    # so a URL reached twice in a run doesn't duplicate rows.
+    conn.execute("""CREATE UNIQUE INDEX IF NOT EXISTS uniq_price_snapshot
+        ON prices(vendor,url,size_g,price,date(seen_at))""")
+    # HTTP validators + last parse per URL, so unchanged pages (304) skip
+    # download and parsing on the next run.
+    conn.execute("""CREATE TABLE IF NOT EXISTS fetch_cache(
+        url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,
+        scraped_json TEXT, seen_at TEXT)""")
     conn.commit()
     return conn
 
 def store(conn, rows):
     if not rows: return
-    cur = conn.cursor()
-    for r in rows:
-        cur.execute("""INSERT INTO prices(
-            vendor,url,name,species,species_latin,grade,currency,price,
-            size_g,size_label,per_g,origin_state,seen_at)
-            VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-            (r["vendor"],r["url"],r["name"],r["species"],r["species_latin"],
-             r["grade"],r["currency"],r["price"],r["size_g"],r["size_label"],
-             r["per_g"],r["origin_state"],datetime.utcnow().isoformat()))
-    conn.commit()
+    # One timestamp and one transaction for the whole batch; executemany
+    # binds the prepared statement in a tight C loop.
+    now = datetime.utcnow().isoformat()
+    with conn:
+        conn.executemany(INSERT_PRICES_SQL,
+            [astuple(r) + (now,) for r in rows])
 
 def latest_best_by_vendor(conn):
     q = """
     WITH ranked AS (
-        SELECT *, ROW_NUMBER() OVER (PARTITION BY vendor,url,size_g ORDER BY datetime(seen_at) DESC) rn
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY vendor,url,size_g ORDER BY seen_at DESC) rn
         FROM prices WHERE species IS NOT NULL AND species<>''
     )
-    SELECT vendor,name,species,species_latin,grade,currency,MIN(price),size_g,size_label,MIN(per_g),url,origin_state
+    SELECT vendor,name,species,species_latin,grade,currency,
+           MIN(price) AS price,size_g,size_label,MIN(per_g) AS per_g,
+           url,origin_state
     FROM ranked WHERE rn=1
     GROUP BY vendor,url,name,species,species_latin,grade,size_g,size_label,origin_state,currency
     """
-    rows = conn.execute(q).fetchall()
+    # Row factory gives name-keyed access, so the dicts the digest wants
+    # come straight from the cursor without positional unpacking.
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
     out=[]
     seen=set()
-    for v,n,s,lat,g,cur,p,sg,sl,pg,u,st in rows:
-        key=(v,u,int(round(sg)),round(p or 0,2))
+    for row in cur.execute(q):
+        key=(row["vendor"],row["url"],int(round(row["size_g"])),round(row["price"] or 0,2))
         if key in seen: continue
         seen.add(key)
-        out.append({
-            "vendor":v,"name":n,"species":s,"species_latin":lat,"grade":g,
-            "currency":cur,"price":p,"size_g":sg,"size_label":sl,
-            "per_g":pg,"url":u,"origin_state":st})
+        out.append(dict(row))
     return out
 
 # =====================================================
 # STRUCTURED DATA (for stock + variants)
 # =====================================================
-def extract_ld_offers_with_availability(soup):
-    items=[]
+def parse_ld_json_blocks(soup):
+    """JSON-parse every ld+json script once; returns a flat list of dicts
+    so downstream extractors never re-decode the same blocks."""
+    blocks=[]
     for tag in soup.find_all("script", type="application/ld+json"):
+        if not tag.string: continue
         try:
-            data=json.loads(tag.string or "{}")
+            data=_json_loads(tag.string)
         except Exception:
             continue
-        data = data if isinstance(data, list) else [data]
-        for it in data:
-            if not isinstance(it, dict): continue
-            if it.get("@type") in ("Product","Offer") or it.get("offers"):
-                name = (it.get("name") or "").strip()
-                desc = (it.get("description") or "")
-                offers = it.get("offers")
-                norm=[]
-                if isinstance(offers, dict): offers=[offers]
-                if isinstance(offers, list):
-                    for o in offers:
-                        if not isinstance(o, dict): continue
-                        price = o.get("price")
-                        if price not in (None,""):
-                            try: price = float(price)
-                            except: price = None
-                        avail = (o.get("availability") or "").lower()
-                        norm.append({
-                            "price": price,
-                            "currency": o.get("priceCurrency") or "USD",
-                            "name": o.get("name") or o.get("description") or "",
-                            "sku": o.get("sku") or "",
-                            "availability": avail
-                        })
-                items.append({"name":name,"desc":desc,"offers":norm})
+        blocks.extend(data if isinstance(data, list) else [data])
+    return blocks
+
+# Frozenset check beats the tuple scan in the per-block loop and keeps the
+# type test in one place.
+_LD_TYPES = frozenset({"Product","Offer"})
+
+def extract_ld_offers_with_availability(blocks):
+    items=[]
+    for it in blocks:
+        if not isinstance(it, dict): continue
+        if it.get("@type") not in _LD_TYPES and not it.get("offers"):
+            continue
+        name = (it.get("name") or "").strip()
+        desc = (it.get("description") or "")
+        offers = it.get("offers")
+        norm=[]
+        if isinstance(offers, dict): offers=[offers]
+        if isinstance(offers, list):
+            for o in offers:
+                if not isinstance(o, dict): continue
+                price = o.get("price")
+                if price not in (None,""):
+                    try: price = float(price)
+                    except: price = None
+                avail = (o.get("availability") or "").lower()
+                norm.append({
+                    "price": price,
+                    "currency": o.get("priceCurrency") or "USD",
+                    "name": o.get("name") or o.get("description") or "",
+                    "sku": o.get("sku") or "",
+                    "availability": avail
+                })
+        items.append({"name":name,"desc":desc,"offers":norm})
     return items
 
+# =====================================================
+# FETCH CACHE (conditional GET)
+# =====================================================
+# Loaded from the fetch_cache table at the start of a run; updates are
+# collected during the crawl and flushed back in one batch at the end.
+_FETCH_CACHE = {}
+_FETCH_CACHE_UPDATES = {}
+
+def load_fetch_cache(conn):
+    _FETCH_CACHE.clear()
+    _FETCH_CACHE_UPDATES.clear()
+    for u,e,lm,sj in conn.execute(
+            "SELECT url,etag,last_modified,scraped_json FROM fetch_cache"):
+        _FETCH_CACHE[u]=(e,lm,sj)
+
+def save_fetch_cache(conn):
+    if not _FETCH_CACHE_UPDATES: return
+    now = datetime.utcnow().isoformat()
+    with conn:
+        conn.executemany("""INSERT OR REPLACE INTO fetch_cache(
+            url,etag,last_modified,scraped_json,seen_at) VALUES(?,?,?,?,?)""",
+            [(u,e,lm,sj,now) for u,(e,lm,sj) in _FETCH_CACHE_UPDATES.items()])
+
+# =====================================================
+# SHOPIFY JSON FAST PATH
+# =====================================================
+# Shopify exposes /products/<handle>.json — product data with no HTML to
+# parse. Remember per host whether the endpoint works so only the first
+# URL on a non-Shopify host pays for the probe.
+_SHOPIFY_JSON_HOSTS = {}
+_TAG_RE = re.compile(r"<[^>]+>")
+
+def rows_from_shopify_json(product, url, vendor):
+    name = (product.get("title") or "").strip()
+    if is_accessory_name_only(name):
+        if VERBOSE_LOG: print(f"[skip:{vendor}] accessory/gift: {url}")
+        return []
+    body = _TAG_RE.sub(" ", product.get("body_html") or "")
+    blob = name + " " + body
+    if not CAVIAR_WORD.search(blob): return []
+    if mentions_non_sturgeon(blob): return []
+    species, latin = extract_species(blob)
+    if not species: return []
+    grade = grade_from_text(blob)
+    out=[]
+    for v in (product.get("variants") or []):
+        if v.get("available") is False: continue
+        vtitle = (v.get("title") or "").strip()
+        size_g = float(v.get("grams") or 0) or parse_size(vtitle, name)
+        if not size_g or size_g < MIN_TIN_G or not any(abs(size_g - s) <= 2 for s in TIN_LIKE_SIZES_G):
+            continue
+        try:
+            price = float(v.get("price"))
+        except (TypeError, ValueError):
+            continue
+        vname = name if not vtitle or vtitle == "Default Title" else f"{name} — {vtitle}"
+        out.append(PriceRow(
+            vendor=vendor,url=url,name=vname,
+            species=species,species_latin=latin,grade=grade,
+            currency="USD",price=price,size_g=size_g,
+            size_label=size_label_both(size_g),per_g=round(price/size_g,2),
+            origin_state=vendor_state(vendor)))
+    return out
+
+def try_shopify_json(sess, url, vendor):
+    """Rows via the .json sibling, or None when the host isn't Shopify."""
+    if "/products/" not in url.lower():
+        return None
+    host = norm_netloc(_urlparse(url).netloc)
+    if _SHOPIFY_JSON_HOSTS.get(host) is False:
+        return None
+    json_url = url.split("#")[0].split("?")[0].rstrip("/") + ".json"
+    r = safe_get(sess, json_url, timeout=10)
+    if not r or not r.ok or "json" not in (r.headers.get("Content-Type") or ""):
+        _SHOPIFY_JSON_HOSTS[host] = False
+        return None
+    try:
+        product = r.json().get("product") or {}
+    except Exception:
+        _SHOPIFY_JSON_HOSTS[host] = False
+        return None
+    _SHOPIFY_JSON_HOSTS[host] = True
+    return rows_from_shopify_json(product, url, vendor)
+
 # =====================================================
 # PRODUCT SCRAPER
 # =====================================================
 def scrape_product(sess, url, vendor):
-    r = safe_get(sess,url)
+    rows = try_shopify_json(sess, url, vendor)
+    if rows is not None:
+        return rows
+    cached = _FETCH_CACHE.get(url)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+    r = safe_get(sess, url, headers=headers or None)
+    if r is not None and r.status_code == 304 and cached and cached[2] is not None:
+        if VERBOSE_LOG: print(f"[cache:{vendor}] not modified: {url}")
+        return [PriceRow(**d) for d in json.loads(cached[2])]
     if not r or not r.ok:
         if VERBOSE_LOG: print(f"[skip:{vendor}] bad url {url}")
         return []
-    soup = BeautifulSoup(r.text,"lxml")
-    text = soup.get_text(" ",strip=True)
-
-    # Skip sold-out/out-of-stock
-    if SOLD_OUT_RE.search(text):
-        if VERBOSE_LOG: print(f"[skip:{vendor}] sold out: {url}")
-        return []
-
-    # Name/title
+    # Cheap pre-parse screen: a page that never says "caviar" can't yield
+    # a row, so don't pay for the DOM build at all. The parser then gets
+    # the raw bytes — lxml sniffs the encoding itself, skipping requests'
+    # full-body decode (and its slow chardet fallback).
+    body = r.content
+    if not CAVIAR_WORD_B.search(body):
+        if VERBOSE_LOG: print(f"[skip:{vendor}] not caviar: {url}")
+        rows = []
+    else:
+        rows = parse_product_page(body, url, vendor)
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if etag or last_modified:
+        _FETCH_CACHE_UPDATES[url] = (
+            etag, last_modified, json.dumps([asdict(row) for row in rows]))
+    return rows
+
+def parse_product_page(html, url, vendor):
+    # `html` may be bytes (preferred) or str; BeautifulSoup handles both.
+    soup = BeautifulSoup(html,"lxml")
+
+    # Name/title first: it is a couple of node lookups and lets us reject
+    # accessories before paying for the whole-document text walk below.
     title = (soup.title.string if soup.title else "") or ""
     h1 = soup.find("h1")
     name = (h1.get_text(" ",strip=True) if h1 else title).strip()
 
-    # Must be caviar, not an accessory
     if is_accessory_name_only(name):
         if VERBOSE_LOG: print(f"[skip:{vendor}] accessory/gift: {url}")
         return []
-    if not CAVIAR_WORD.search((name + " " + text).lower()):
+
+    # Pull text from the product container rather than the whole document:
+    # nav/footer/recommendation blocks add bytes to every regex scan below
+    # and can mention "caviar spoons" etc. Fall back to the full soup when
+    # the page has no <main>/<article> or it comes back empty.
+    main_node = soup.find("main") or soup.find("article") or soup.body or soup
+    text = main_node.get_text(" ",strip=True)
+    if not text:
+        text = soup.get_text(" ",strip=True)
+
+    # Skip sold-out/out-of-stock
+    if SOLD_OUT_RE.search(text):
+        if VERBOSE_LOG: print(f"[skip:{vendor}] sold out: {url}")
+        return []
+
+    # Whole-page text is expensive to rebuild; concatenate with the name once
+    # and reuse it for every later keyword scan.
+    name_and_text = name + " " + text
+    # CAVIAR_WORD is already case-insensitive, so skip the .lower() copy of
+    # the whole page; checking the short name first usually avoids scanning
+    # the page text at all.
+    if not (CAVIAR_WORD.search(name) or CAVIAR_WORD.search(text)):
         if VERBOSE_LOG: print(f"[skip:{vendor}] not caviar: {url}")
         return []
 
@@ -271,8 +552,8 @@ def scrape_product(sess, url, vendor):
         return []
 
     # Size detection with minimum tin rule
-    size_g = parse_size(name) or parse_size(text)
-    if not size_g or size_g < MIN_TIN_G or not any(abs(size_g - s) <= 2 for s in LIKELY_TIN_SIZES_G+[MIN_TIN_G]):
+    size_g = parse_size(name, text)
+    if not size_g or size_g < MIN_TIN_G or not any(abs(size_g - s) <= 2 for s in TIN_LIKE_SIZES_G):
         if VERBOSE_LOG: print(f"[skip:{vendor}] size < {MIN_TIN_G} g or not tin-like: {url}")
         return []
 
@@ -280,7 +561,7 @@ def scrape_product(sess, url, vendor):
     price = None
     currency = "USD"
 
-    for item in extract_ld_offers_with_availability(soup):
+    for item in extract_ld_offers_with_availability(parse_ld_json_blocks(soup)):
         for offer in (item.get("offers") or []):
             avail = offer.get("availability","")
             if "instock" in avail or avail == "":
@@ -296,44 +577,148 @@ def scrape_product(sess, url, vendor):
         m = MONEY_RE.search(text)
         if m:
             price = float(m.group(2))
-            currency = {'$':'USD','£':'GBP','€':'EUR'}.get(m.group(1),'USD')
+            currency = CURRENCY_MAP.get(m.group(1),'USD')
 
     if price is None:
         if VERBOSE_LOG: print(f"[skip:{vendor}] no price found: {url}")
         return []
 
-    grade = grade_from_text(name + " " + text)
+    grade = grade_from_text(name_and_text)
     size_label = size_label_both(size_g)
     per_g = round(price/size_g, 2)
 
-    return [{
-        "vendor":vendor,"url":url,"name":name,
-        "species":species,"species_latin":latin,"grade":grade,
-        "currency":currency,"price":price,"size_g":size_g,
-        "size_label":size_label,"per_g":per_g,"origin_state":vendor_state(vendor)
-    }]
+    return [PriceRow(
+        vendor=vendor,url=url,name=name,
+        species=species,species_latin=latin,grade=grade,
+        currency=currency,price=price,size_g=size_g,
+        size_label=size_label,per_g=per_g,origin_state=vendor_state(vendor)
+    )]
 
 # =====================================================
 # DISCOVERY (kept simple here – seeds or prior logic)
 # =====================================================
+# urlparse is regex + namedtuple allocation per call and the same URLs
+# recur constantly (dedup key, whitelist check, Shopify probe); memoize.
+_urlparse = functools.lru_cache(maxsize=4096)(urlparse)
+
 def is_product_url(u):
     low = u.lower()
-    if any(x in low for x in DISALLOWED_URL_PARTS): return False
-    return any(h in low for h in PRODUCT_URL_HINTS)
+    if DISALLOWED_URL_RE.search(low): return False
+    return bool(PRODUCT_HINT_RE.search(low))
+
+def normalize_url(u):
+    """Canonical form for dedup: lowercase host, no fragment, no trailing
+    slash, tracking params dropped and the rest sorted."""
+    p = _urlparse(u)
+    params = sorted((k,v) for k,v in parse_qs(p.query).items()
+                    if not k.startswith("utm_"))
+    return urlunparse((p.scheme, p.netloc.lower(), p.path.rstrip("/") or "/",
+                       "", urlencode(params, doseq=True), ""))
+
+# URLs already scraped during this run (cleared per run) so overlapping
+# seed lists and shared domains don't trigger duplicate GETs.
+_SCRAPED_THIS_RUN = set()
+
+def norm_netloc(host):
+    host = (host or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def compile_product_link_selector(cfg):
+    """Compile the site's product_link CSS selector once per site (or
+    None); soupsieve otherwise re-resolves the selector string on every
+    start page."""
+    vendor_sel = (cfg.get("selectors") or {}).get("product_link")
+    if not vendor_sel:
+        return None
+    try:
+        return soupsieve.compile(vendor_sel)
+    except Exception as e:
+        if VERBOSE_LOG: print("bad product_link selector:", e, cfg.get("name"))
+        return None
+
+def discover_product_links(soup, base_url, cfg, product_sel=None):
+    """Product links from a category/start page. Uses the site's own
+    (precompiled) product_link selector when configured — one targeted
+    CSS pass — and only falls back to scanning every anchor when it
+    isn't."""
+    whitelist = frozenset(norm_netloc(h) for h in (cfg.get("allow_domains") or []))
+    anchors = product_sel.select(soup) if product_sel else soup.find_all("a", href=True)
+    links = {}
+    for a in anchors:
+        href = a.get("href")
+        if not href: continue
+        full = urljoin(base_url, href)
+        if not is_product_url(full): continue
+        if whitelist and norm_netloc(_urlparse(full).netloc) not in whitelist:
+            continue
+        key = normalize_url(full)
+        if key not in links:
+            links[key] = full
+            if len(links) >= MAX_LINKS_PER_SITE: break
+    return list(links.values())
+
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "8"))
+SITE_WORKERS   = int(os.getenv("SITE_WORKERS", "4"))
 
 def crawl_site(cfg, deadline):
     results=[]
     vendor=cfg.get("name")
-    sess=make_session()
-
-    # Seed product URLs (trusted)
-    for u in list(cfg.get("seed_product_urls") or []):
-        if datetime.utcnow()>deadline: break
-        if not u: continue
-        if not is_product_url(u): continue
-        rows = scrape_product(sess, u, vendor)
-        results.extend(rows)
-        time.sleep(0.08)
+    sess=shared_session()
+
+    # Per-site politeness override: min_gap in the YAML widens (or
+    # narrows) the request spacing for that site's hosts.
+    gap = cfg.get("min_gap")
+    if gap is not None:
+        for h in (cfg.get("allow_domains") or []):
+            _HOST_GAP[norm_netloc(h)] = float(gap)
+
+    # Seed product URLs (trusted) plus links discovered from the site's
+    # start/category pages. Dedupe on the normalized URL so the same
+    # product listed twice (or on an earlier site this run) is fetched once.
+    urls=[]
+    def add_url(u):
+        key = normalize_url(u)
+        if key in _SCRAPED_THIS_RUN: return
+        _SCRAPED_THIS_RUN.add(key)
+        urls.append(u)
+
+    for u in (cfg.get("seed_product_urls") or []):
+        if u and is_product_url(u):
+            add_url(u)
+
+    product_sel = compile_product_link_selector(cfg)
+    # Without a site selector only anchors matter, so strain the parse
+    # down to <a> tags and skip building the rest of the category page.
+    # A CSS selector needs ancestor context (e.g. ".products a"), so that
+    # path keeps the full tree.
+    parse_only = None if product_sel else SoupStrainer("a", href=True)
+    for start in (cfg.get("start_urls") or []):
+        if time.monotonic()>deadline: break
+        if not start: continue
+        r = safe_get(sess, start)
+        if not r or not r.ok:
+            if VERBOSE_LOG: print(f"[skip:{vendor}] bad start url {start}")
+            continue
+        soup = BeautifulSoup(r.content,"lxml",parse_only=parse_only)
+        for full in discover_product_links(soup, start, cfg,
+                                           product_sel=product_sel):
+            add_url(full)
+
+    urls = urls[:MAX_PRODUCTS_PER_SITE]
+    if not urls:
+        return results
+
+    with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as ex:
+        futures={ex.submit(scrape_product, sess, u, vendor): u for u in urls}
+        for fut in as_completed(futures):
+            if time.monotonic()>deadline:
+                for f in futures:
+                    f.cancel()
+                break
+            try:
+                results.extend(fut.result())
+            except Exception as e:
+                if VERBOSE_LOG: print("scrape exception:", e, futures[fut])
 
     # Optionally, you can add deeper crawling here (category pages, sitemaps)
     return results
@@ -342,17 +727,29 @@ def crawl_site(cfg, deadline):
 # MAIN SCRAPE ENTRY
 # =====================================================
 def init_db_and_scrape(yaml_path="price_sites.yaml"):
-    start=datetime.utcnow()
-    deadline=start+timedelta(seconds=RUN_LIMIT_SECONDS)
+    # Monotonic timebox: immune to NTP/wall-clock jumps and cheaper to
+    # compare than datetime objects in the per-future deadline checks.
+    deadline=time.monotonic()+RUN_LIMIT_SECONDS
     with open(yaml_path) as f:
         conf=yaml.safe_load(f) or {}
     sites=conf.get("sites",[])
     conn=init_db(DB_PATH)
+    load_fetch_cache(conn)
+    _SCRAPED_THIS_RUN.clear()
+    # Sites are independent hosts, so crawl them concurrently too; each
+    # crawl_site still runs its own product-page pool and honors the
+    # shared deadline internally.
     all_rows=[]
-    for s in sites:
-        if datetime.utcnow()>deadline: break
-        all_rows+=crawl_site(s,deadline)
+    with ThreadPoolExecutor(max_workers=SITE_WORKERS) as ex:
+        futures={ex.submit(crawl_site, s, deadline): s for s in sites}
+        for fut in as_completed(futures):
+            try:
+                all_rows+=fut.result()
+            except Exception as e:
+                if VERBOSE_LOG:
+                    print("site exception:", e, futures[fut].get("name"))
     if all_rows: store(conn,all_rows)
+    save_fetch_cache(conn)
     return latest_best_by_vendor(conn)
 
 # =====================================================
@@ -375,15 +772,17 @@ def best_sort_key(item):
 
 def group_and_pick(rows):
     goods = [r for r in rows if r.get("size_g") and r["size_g"] >= MIN_TIN_G]
-    buckets={}
+    # One stable sort up front means every bucket comes out already ordered,
+    # so no per-bucket re-sort is needed below.
+    goods.sort(key=best_sort_key)
+    buckets=defaultdict(list)
     for r in goods:
         b=bucket_for_size(r["size_g"])
-        if not b: 
+        if not b:
             continue
-        buckets.setdefault(b,[]).append(r)
-    top={}
-    for b,it in buckets.items():
-        top[b]=sorted(it,key=best_sort_key)[:6]
+        buckets[b].append(r)
+    buckets=dict(buckets)
+    top={b: it[:6] for b,it in buckets.items()}
     return buckets,top
 
 # =====================================================
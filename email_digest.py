@@ -21,7 +21,8 @@ FROM_EMAIL       = os.getenv("FROM_EMAIL")
 TO_EMAIL         = os.getenv("TO_EMAIL", "kylekizziah@gmail.com")
 
 env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)),
-                  autoescape=select_autoescape(["html","xml"]))
+                  autoescape=select_autoescape(["html","xml"]),
+                  auto_reload=False)
 
 def main():
     rows = run_scrape(str(YAML_PATH))
@@ -21,15 +21,24 @@ FROM_EMAIL       = os.getenv("FROM_EMAIL")
 TO_EMAIL         = os.getenv("TO_EMAIL", "kylekizziah@gmail.com")
 
 # --- Templates ---
+# auto_reload=False: templates never change mid-run, so skip the mtime
+# stat Jinja otherwise does on every get_template.
 env = Environment(
     loader=FileSystemLoader(str(TEMPLATES_DIR)),
-    autoescape=select_autoescape(["html","xml"])
+    autoescape=select_autoescape(["html","xml"]),
+    auto_reload=False
 )
 
+# Compiled template cached after first lookup so repeated renders skip the
+# loader stat/parse; lazy so a missing file still hits the fallback below.
+_digest_tpl = None
+
 def render_html(date_str, top_picks, buckets):
+    global _digest_tpl
     try:
-        tpl = env.get_template("digest_template.html")
-        return tpl.render(date=date_str, top_picks=top_picks, buckets=buckets)
+        if _digest_tpl is None:
+            _digest_tpl = env.get_template("digest_template.html")
+        return _digest_tpl.render(date=date_str, top_picks=top_picks, buckets=buckets)
     except TemplateNotFound:
         # Fallback minimal HTML so a missing template never breaks the cron
         body = [f"<h1>🐟 Daily Caviar Digest — {date_str}</h1>",
@@ -71,6 +80,16 @@ def render_text(date_str, top_picks):
     lines.append("Data auto-gathered; prices may change. Edit price_sites.yaml to add/remove sellers.")
     return "\n".join(lines)
 
+# Built once and reused: the client keeps an HTTP connection pool, so
+# repeated sends (multi-recipient digests) skip per-send TLS handshakes.
+_sg_client = None
+
+def get_sendgrid_client():
+    global _sg_client
+    if _sg_client is None:
+        _sg_client = SendGridAPIClient(SENDGRID_API_KEY)
+    return _sg_client
+
 def send_via_sendgrid(subject, html_body, text_body):
     missing = [k for k,v in {
         "SENDGRID_API_KEY": SENDGRID_API_KEY,
@@ -81,7 +100,7 @@ def send_via_sendgrid(subject, html_body, text_body):
         print("Missing env vars:", ", ".join(missing))
         return  # Do not crash cron; just log
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
+    sg = get_sendgrid_client()
     msg = Mail(from_email=FROM_EMAIL, to_emails=TO_EMAIL,
                subject=subject, html_content=html_body, plain_text_content=text_body)
     resp = sg.send(msg)